@@ -186,7 +186,11 @@
                 scikit-learn
                 polars
                 aiohttp
+                aiosqlite
+                cachetools
+                orjson
                 python-telegram-bot
+                uvloop
               ]))
 
             self.packages.${system}.sui-testnet
@@ -7,159 +7,277 @@ External services can POST to /<uuid> to send notifications.
 """
 
 import asyncio
-import json
 import logging
 import os
+import re
+import signal
 import sqlite3
 import uuid
-from typing import Dict, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, List, Tuple
 
 import aiohttp
+import aiosqlite
+import orjson
 from aiohttp import web
+from cachetools import TTLCache
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
 logger = logging.getLogger(__name__)
+# Per-request access lines are too noisy (and too costly) for production
+logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
+
+# Bot API endpoint, resolved once per process from the token read in main()
+TELEGRAM_SEND_MESSAGE_URL = "https://api.telegram.org/bot{token}/sendMessage"
+
+# Outgoing notifications: Telegram allows about 30 messages per second per bot
+SEND_WORKERS = 4
+SEND_QUEUE_SIZE = 250  # per worker; further notifications are refused with 503
+SEND_BATCH_SIZE = 20
+SEND_BATCH_WINDOW = 0.05  # seconds to wait for more messages to batch
+SEND_MAX_ATTEMPTS = 3
+SEND_DRAIN_TIMEOUT = 5  # seconds
+SEND_SEPARATOR = "\n---\n"
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+# Fragments of Bot API 400 descriptions that concern the chat, not the text
+_CHAT_ERROR_MARKERS = (
+    'chat not found',
+    'chat_write_forbidden',
+    'have no rights',
+    'not enough rights',
+    'need administrator rights',
+    'upgraded to a supergroup',
+    'user is deactivated',
+    'peer_id_invalid',
+)
 
+# Request bodies larger than this are rejected
+MAX_BODY_SIZE = 64 * 1024
+# Request bodies larger than this are formatted in a worker thread
+BODY_OFFLOAD_THRESHOLD = 8 * 1024
+
+# Translation tables to strip control characters in one C-level pass:
+# bytes outside printable ASCII (except tab/newline/CR) become spaces,
+# while for text only the C0 control characters are dropped
+_CTRL_BYTES_TRANS = bytes.maketrans(
+    bytes(range(256)),
+    bytes(b if 32 <= b <= 126 or b in (9, 10, 13) else 0x20 for b in range(256))
+)
+_CTRL_CHARS_TRANS = {i: None for i in range(32) if i not in (9, 10, 13)}
+
+# Escape Telegram Markdown special characters in a single pass
+_MD_ESCAPE_TRANS = str.maketrans({c: '\\' + c for c in '_*[]`'})
+
+# Valid topic names: ASCII letters, digits, hyphens and underscores, with at
+# least one letter or digit
+_TOPIC_NAME_RE = re.compile(r'\A[A-Za-z0-9_-]*[A-Za-z0-9][A-Za-z0-9_-]*\Z')
+
+# SQL statements are module constants so that every call passes the identical
+# string and hits sqlite3's per-connection prepared statement cache
+_SQL_INSERT_TOPIC = "INSERT INTO topics (topic_name, user_id, chat_id) VALUES (?, ?, ?)"
+_SQL_GET_TOPIC = "SELECT topic_name, user_id, chat_id, created_at FROM topics WHERE topic_name = ?"
+_SQL_GET_USER_TOPICS = (
+    "SELECT topic_name, user_id, chat_id, created_at FROM topics "
+    "WHERE user_id = ? ORDER BY created_at DESC"
+)
+_SQL_FIND_USER_TOPIC = (
+    "SELECT topic_name, user_id, chat_id, created_at FROM topics "
+    "WHERE user_id = ? AND topic_name = ?"
+)
+_SQL_DELETE_USER_TOPIC = "DELETE FROM topics WHERE user_id = ? AND topic_name = ?"
 
-class TopicDatabase:
-    def __init__(self, db_path: str = "telegram_topics.db"):
+
+class SqlitePool:
+    """One read-write connection plus a queue of read-only connections"""
+
+    def __init__(self, db_path: str, readers: int = 4):
         self.db_path = db_path
-        self.init_database()
-    
-    def init_database(self):
-        """Initialize the SQLite database and create tables"""
-        conn = sqlite3.connect(self.db_path)
+        self.readers = readers
+        self.writer: Optional[aiosqlite.Connection] = None
+        self._read_conns: List[aiosqlite.Connection] = []
+        self._read_q: asyncio.Queue = asyncio.Queue()
+
+    async def connect(self, init=None):
+        """Open the writer, run the optional init coroutine on it, then open the readers
+
+        Readers are opened last because read-only connections cannot create the database file.
+        """
+        self.writer = await aiosqlite.connect(self.db_path)
+        await self.writer.execute('PRAGMA journal_mode=WAL')
+        await self.writer.execute('PRAGMA synchronous=NORMAL')
+        await self._apply_pragmas(self.writer)
+        if init is not None:
+            await init(self.writer)
+
+        for _ in range(self.readers):
+            conn = await aiosqlite.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            await self._apply_pragmas(conn)
+            self._read_conns.append(conn)
+            self._read_q.put_nowait(conn)
+
+    @staticmethod
+    async def _apply_pragmas(conn: aiosqlite.Connection):
+        await conn.execute('PRAGMA temp_store=memory')
+        await conn.execute('PRAGMA cache_size=-64000')
+        await conn.execute('PRAGMA mmap_size=268435456')
+
+    async def close(self):
+        """Close every connection in the pool"""
+        for conn in self._read_conns:
+            await conn.close()
+        self._read_conns = []
+        self._read_q = asyncio.Queue()
+        if self.writer is not None:
+            await self.writer.close()
+            self.writer = None
+
+    @asynccontextmanager
+    async def acquire_read(self):
+        """Borrow a read-only connection, waiting if all are in use"""
+        conn = await self._read_q.get()
         try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS topics (
-                    topic_name TEXT PRIMARY KEY,
-                    user_id INTEGER NOT NULL,
-                    chat_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create index for faster lookups
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_user_id ON topics(user_id)
-            ''')
-            
-            conn.commit()
-            logger.info(f"Database initialized at {self.db_path}")
+            yield conn
         finally:
-            conn.close()
-    
-    def add_topic(self, topic_name: str, user_id: int, chat_id: int) -> bool:
+            self._read_q.put_nowait(conn)
+
+
+class AsyncTopicDatabase:
+    def __init__(self, db_path: str = "telegram_topics.db", readers: int = 4):
+        self.db_path = db_path
+        self.pool = SqlitePool(db_path, readers)
+        # Topic lookups on the webhook path; misses are cached briefly to absorb 404 floods
+        self._topic_cache = TTLCache(maxsize=10_000, ttl=300)
+        self._missing_topic_cache = TTLCache(maxsize=10_000, ttl=10)
+        # Bumped on every invalidation, so a lookup that raced with a write
+        # does not put a stale result back into the cache
+        self._cache_generation = 0
+
+    def _invalidate_topic(self, topic_name: str):
+        self._cache_generation += 1
+        self._topic_cache.pop(topic_name, None)
+        self._missing_topic_cache.pop(topic_name, None)
+
+    async def connect(self):
+        """Open the connection pool and initialize the database"""
+        await self.pool.connect(init=self.init_database)
+
+    async def close(self):
+        """Close the connection pool"""
+        await self.pool.close()
+
+    async def init_database(self, conn: aiosqlite.Connection):
+        """Create tables and indexes"""
+        await conn.executescript('''
+            CREATE TABLE IF NOT EXISTS topics (
+                topic_name TEXT PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                chat_id INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            -- Serves lookups by user and by (user, topic) as index-only probes;
+            -- it supersedes the older single-column idx_user_id
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_user_topic ON topics(user_id, topic_name);
+            DROP INDEX IF EXISTS idx_user_id;
+        ''')
+        await conn.commit()
+        logger.info(f"Database initialized at {self.db_path}")
+
+    async def add_topic(self, topic_name: str, user_id: int, chat_id: int) -> bool:
         """Add a new topic to the database"""
-        conn = sqlite3.connect(self.db_path)
         try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO topics (topic_name, user_id, chat_id)
-                VALUES (?, ?, ?)
-            ''', (topic_name, user_id, chat_id))
-            conn.commit()
+            await self.pool.writer.execute(_SQL_INSERT_TOPIC, (topic_name, user_id, chat_id))
+            await self.pool.writer.commit()
+            self._invalidate_topic(topic_name)
             return True
         except sqlite3.IntegrityError:
+            # Release the write lock held by the failed INSERT
+            await self.pool.writer.rollback()
             return False  # Topic name already exists globally
-        finally:
-            conn.close()
-    
-    def get_topic(self, topic_name: str) -> Optional[Dict]:
-        """Get a topic by name"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT topic_name, user_id, chat_id, created_at
-                FROM topics WHERE topic_name = ?
-            ''', (topic_name,))
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "topic_name": row[0],
-                    "user_id": row[1],
-                    "chat_id": row[2],
-                    "created_at": row[3]
-                }
+
+    async def get_topic(self, topic_name: str) -> Optional[Dict]:
+        """Get a topic by name, served from cache when possible"""
+        topic = self._topic_cache.get(topic_name)
+        if topic is not None:
+            return topic
+        if topic_name in self._missing_topic_cache:
             return None
-        finally:
-            conn.close()
-    
-    def get_user_topics(self, user_id: int) -> List[Dict]:
+
+        generation = self._cache_generation
+        async with self.pool.acquire_read() as conn:
+            async with conn.execute(_SQL_GET_TOPIC, (topic_name,)) as cursor:
+                row = await cursor.fetchone()
+        cacheable = generation == self._cache_generation
+        if row:
+            topic = {
+                "topic_name": row[0],
+                "user_id": row[1],
+                "chat_id": row[2],
+                "created_at": row[3]
+            }
+            if cacheable:
+                self._topic_cache[topic_name] = topic
+            return topic
+        if cacheable:
+            self._missing_topic_cache[topic_name] = True
+        return None
+
+    async def get_user_topics(self, user_id: int) -> List[Dict]:
         """Get all topics for a user"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT topic_name, user_id, chat_id, created_at
-                FROM topics WHERE user_id = ?
-                ORDER BY created_at DESC
-            ''', (user_id,))
-            rows = cursor.fetchall()
-            return [
-                {
-                    "topic_name": row[0],
-                    "user_id": row[1],
-                    "chat_id": row[2],
-                    "created_at": row[3]
-                }
-                for row in rows
-            ]
-        finally:
-            conn.close()
-    
-    def find_topic_by_name(self, user_id: int, topic_name: str) -> Optional[Dict]:
-        """Find a topic by user ID and topic name"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT topic_name, user_id, chat_id, created_at
-                FROM topics WHERE user_id = ? AND topic_name = ?
-            ''', (user_id, topic_name))
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "topic_name": row[0],
-                    "user_id": row[1],
-                    "chat_id": row[2],
-                    "created_at": row[3]
-                }
-            return None
-        finally:
-            conn.close()
-    
-    def delete_topic(self, user_id: int, topic_name: str) -> bool:
-        """Delete a topic by user ID and topic name"""
-        conn = sqlite3.connect(self.db_path)
-        try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM topics WHERE user_id = ? AND topic_name = ?
-            ''', (user_id, topic_name))
-            conn.commit()
-            return cursor.rowcount > 0
-        finally:
-            conn.close()
+        async with self.pool.acquire_read() as conn:
+            async with conn.execute(_SQL_GET_USER_TOPICS, (user_id,)) as cursor:
+                rows = await cursor.fetchall()
+        return [
+            {
+                "topic_name": row[0],
+                "user_id": row[1],
+                "chat_id": row[2],
+                "created_at": row[3]
+            }
+            for row in rows
+        ]
 
+    async def find_topic_by_name(self, user_id: int, topic_name: str) -> Optional[Dict]:
+        """Find a topic by user ID and topic name"""
+        async with self.pool.acquire_read() as conn:
+            async with conn.execute(_SQL_FIND_USER_TOPIC, (user_id, topic_name)) as cursor:
+                row = await cursor.fetchone()
+        if row:
+            return {
+                "topic_name": row[0],
+                "user_id": row[1],
+                "chat_id": row[2],
+                "created_at": row[3]
+            }
+        return None
 
-# Global database instance
-db = TopicDatabase()
+    async def delete_topic(self, user_id: int, topic_name: str) -> bool:
+        """Delete a topic by user ID and topic name"""
+        async with self.pool.writer.execute(_SQL_DELETE_USER_TOPIC, (user_id, topic_name)) as cursor:
+            deleted = cursor.rowcount > 0
+        await self.pool.writer.commit()
+        self._invalidate_topic(topic_name)
+        return deleted
 
 
 class NotifierBot:
-    def __init__(self, bot_token: str, webhook_port: int = 8080):
+    def __init__(self, bot_token: str, db: AsyncTopicDatabase, webhook_port: int = 8080):
         self.bot_token = bot_token
         self.webhook_port = webhook_port
         self.app = Application.builder().token(bot_token).build()
+        self.app.bot_data['db'] = db
         
         # Register command handlers
         self.app.add_handler(CommandHandler("start", self.start_command))
@@ -196,12 +314,13 @@ class NotifierBot:
         chat_id = update.effective_chat.id
 
         # Validate topic name (no special characters for URL safety)
-        if not topic_name.replace("-", "").replace("_", "").isalnum():
+        if not _TOPIC_NAME_RE.match(topic_name):
             await update.message.reply_text("❌ Topic name can only contain letters, numbers, hyphens, and underscores.")
             return
 
         # Register topic (topic name is globally unique)
-        if db.add_topic(topic_name, user_id, chat_id):
+        db = context.bot_data['db']
+        if await db.add_topic(topic_name, user_id, chat_id):
             await update.message.reply_text(
                 f"✅ Topic '{topic_name}' registered!\n\n"
                 f"🔗 Webhook endpoint: `/{topic_name}`\n\n"
@@ -221,7 +340,8 @@ class NotifierBot:
         user_id = update.effective_user.id
 
         # Delete topic from database
-        if db.delete_topic(user_id, topic_name):
+        db = context.bot_data['db']
+        if await db.delete_topic(user_id, topic_name):
             await update.message.reply_text(f"✅ Topic '{topic_name}' unregistered!")
         else:
             await update.message.reply_text(f"❌ Topic '{topic_name}' not found!")
@@ -229,7 +349,8 @@ class NotifierBot:
     async def list_topics_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /list command"""
         user_id = update.effective_user.id
-        user_topics = db.get_user_topics(user_id)
+        db = context.bot_data['db']
+        user_topics = await db.get_user_topics(user_id)
 
         if not user_topics:
             await update.message.reply_text("📋 You have no registered topics.")
@@ -243,105 +364,273 @@ class NotifierBot:
         await update.message.reply_text(message, parse_mode='Markdown')
 
 
+def format_message_body(raw_body: bytes, is_json: bool) -> Optional[str]:
+    """Turn a request body into Telegram Markdown, or None if it carries no message
+
+    This is CPU-bound and has no side effects, so it can run in a worker thread.
+    """
+    if is_json:
+        try:
+            try:
+                # Well-formed bodies are the common case and parse as they are
+                data = orjson.loads(raw_body)
+            except orjson.JSONDecodeError:
+                # Only scrub control characters from bodies that fail to parse
+                clean_raw_body = raw_body.translate(_CTRL_BYTES_TRANS).decode('ascii')
+                logger.debug("Cleaned raw body: %r", clean_raw_body)
+                data = orjson.loads(clean_raw_body)
+            logger.debug("Parsed JSON data: %r", data)
+            # Use the 'message' field when present, otherwise the whole document
+            if isinstance(data, dict) and 'message' in data:
+                message = data['message']
+            else:
+                message = data
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON from request even after cleaning: {e}")
+            logger.debug("Raw body that failed: %r", raw_body)
+            # Fallback: treat the entire body as text message
+            message = raw_body.decode('utf-8', errors='replace')
+            logger.debug("Fallback: treating as text message: %r", message)
+    else:
+        message = raw_body.decode('utf-8', errors='replace')
+        logger.debug("Decoded text message: %r", message)
+
+    if not message:
+        return None
+
+    logger.debug("Message type: %s", type(message))
+
+    # Structured JSON is pretty-printed as a code block, anything else is sent as text
+    if isinstance(message, (dict, list)):
+        return f"```json\n{orjson.dumps(message, option=orjson.OPT_INDENT_2).decode()}\n```"
+    # Remove control characters and escape potential markdown characters
+    clean_message = str(message).translate(_CTRL_CHARS_TRANS)
+    return clean_message.translate(_MD_ESCAPE_TRANS)
+
+
 async def webhook_handler(request):
     """Handle HTTP POST requests to /<topic_name>"""
     topic_name = request.match_info.get('topic_name')
     
-    logger.info(f"Webhook request received for topic: {topic_name}")
-    logger.info(f"Content-Type: {request.content_type}")
+    logger.debug("Webhook request received for topic: %s", topic_name)
+    logger.debug("Content-Type: %s", request.content_type)
     
+    # Header checks come first, so junk requests never reach the database or
+    # the body parser; chunked bodies without a Content-Length are capped by
+    # the application's client_max_size
+    if request.content_length is not None and request.content_length > MAX_BODY_SIZE:
+        return web.Response(status=413, text="Payload too large")
+    if request.content_length == 0:
+        return web.Response(status=400, text="No message provided")
+
     # Get topic from database
-    topic_info = db.get_topic(topic_name)
+    db = request.app['db']
+    topic_info = await db.get_topic(topic_name)
     if not topic_info:
         return web.Response(status=404, text="Topic not found")
 
     try:
         # Get raw body first for debugging
         raw_body = await request.read()
-        logger.info(f"Raw request body: {repr(raw_body)}")
-        logger.info(f"Raw body length: {len(raw_body)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Raw request body: %r", raw_body)
+            logger.debug("Raw body length: %d", len(raw_body))
         
-        # Get message from request body
-        if request.content_type == 'application/json':
-            try:
-                # First try to clean control characters from the raw body
-                import json
-                clean_raw_body = ''.join(chr(b) if 32 <= b <= 126 or b in [9, 10, 13] else ' ' for b in raw_body)
-                logger.info(f"Cleaned raw body: {repr(clean_raw_body)}")
-                
-                data = json.loads(clean_raw_body)
-                message = data.get('message', str(data))
-                logger.info(f"Parsed JSON data: {repr(data)}")
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON from request even after cleaning: {e}")
-                logger.info(f"Raw body that failed: {repr(raw_body)}")
-                # Fallback: treat the entire body as text message
-                message = raw_body.decode('utf-8', errors='replace')
-                logger.info(f"Fallback: treating as text message: {repr(message)}")
+        # Large bodies are cleaned and formatted off the event loop
+        is_json = request.content_type == 'application/json'
+        if len(raw_body) > BODY_OFFLOAD_THRESHOLD:
+            loop = asyncio.get_running_loop()
+            formatted_message = await loop.run_in_executor(
+                request.app['body_executor'], format_message_body, raw_body, is_json
+            )
         else:
-            message = raw_body.decode('utf-8', errors='replace')
-            logger.info(f"Decoded text message: {repr(message)}")
+            formatted_message = format_message_body(raw_body, is_json)
 
-        if not message:
+        if formatted_message is None:
             return web.Response(status=400, text="No message provided")
 
-        # Log the raw message for debugging
-        logger.info(f"Received message for topic '{topic_name}': {repr(message)}")
-        logger.info(f"Message length: {len(message)}, type: {type(message)}")
-
-        # Get topic info
         chat_id = topic_info['chat_id']
-
-        # Send notification via Telegram
-        bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-        telegram_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        
-        # Check if message looks like JSON and format it appropriately
-        formatted_message = message
-        try:
-            # Try to parse as JSON to validate and pretty-print
-            import json
-            logger.info(f"Attempting to parse as JSON: {message[:100]}...")
-            parsed_json = json.loads(message)
-            # Format as code block for better readability
-            formatted_message = f"```json\n{json.dumps(parsed_json, indent=2)}\n```"
-            logger.info("Successfully parsed and formatted as JSON")
-        except (json.JSONDecodeError, TypeError) as e:
-            # Not JSON or invalid JSON, escape potential markdown characters and remove control characters
-            logger.info(f"JSON parsing failed: {e}. Treating as regular text.")
-            # Remove control characters that cause JSON encoding issues
-            clean_message = ''.join(char for char in message if ord(char) >= 32 or char in '\n\r\t')
-            formatted_message = clean_message.replace('_', '\\_').replace('*', '\\*').replace('[', '\\[').replace(']', '\\]').replace('`', '\\`')
-        
         notification_text = f"🔔 **{topic_name}**\n\n{formatted_message}"
         
         # Log the final message being sent to Telegram
-        logger.info(f"Sending to Telegram: {repr(notification_text)}")
-        logger.info(f"Final message length: {len(notification_text)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending to Telegram: %r", notification_text)
+            logger.debug("Final message length: %d", len(notification_text))
         
-        async with aiohttp.ClientSession() as session:
-            payload = {
-                'chat_id': chat_id,
-                'text': notification_text,
-                'parse_mode': 'Markdown'
-            }
-            logger.info(f"Telegram payload: {repr(payload)}")
-            async with session.post(telegram_url, json=payload) as resp:
-                if resp.status == 200:
-                    return web.Response(status=200, text="Notification sent")
-                else:
-                    logger.error(f"Failed to send Telegram message: {resp.status}")
-                    return web.Response(status=500, text="Failed to send notification")
+        # Hand over to the sender workers, which batch messages per chat; a
+        # chat always maps to the same worker so its messages stay in order
+        queues = request.app['send_queues']
+        try:
+            queues[chat_id % len(queues)].put_nowait((chat_id, notification_text))
+        except asyncio.QueueFull:
+            return web.Response(status=503, text="Notification queue full", headers={'Retry-After': '5'})
+        return web.Response(status=202, text="Notification queued")
 
+    except web.HTTPRequestEntityTooLarge:
+        return web.Response(status=413, text="Payload too large")
     except Exception as e:
         logger.error(f"Error processing webhook: {e}")
         return web.Response(status=500, text="Internal server error")
 
 
-async def create_webhook_app():
+def coalesce_messages(batch: List[Tuple[int, str]]) -> List[Tuple[int, List[str]]]:
+    """Group queued messages per chat, keeping each joined group under Telegram's length limit"""
+    grouped: Dict[int, List[str]] = {}
+    for chat_id, text in batch:
+        grouped.setdefault(chat_id, []).append(text)
+
+    messages = []
+    for chat_id, texts in grouped.items():
+        parts = [texts[0]]
+        length = len(texts[0])
+        for text in texts[1:]:
+            if length + len(SEND_SEPARATOR) + len(text) > TELEGRAM_MAX_MESSAGE_LENGTH:
+                messages.append((chat_id, parts))
+                parts = [text]
+                length = len(text)
+            else:
+                parts.append(text)
+                length += len(SEND_SEPARATOR) + len(text)
+        messages.append((chat_id, parts))
+    return messages
+
+
+async def send_telegram_message(app, chat_id: int, text: str) -> Tuple[int, str]:
+    """Send a message via the Bot API, waiting out rate limits
+
+    Returns the final HTTP status and Telegram's error description (empty on success).
+    A 429 pauses every sender worker until Telegram's retry_after has passed.
+    """
+    loop = asyncio.get_running_loop()
+    backoff = app['send_backoff']
+    payload = {
+        'chat_id': chat_id,
+        'text': text,
+        'parse_mode': 'Markdown'
+    }
+    for attempt in range(1, SEND_MAX_ATTEMPTS + 1):
+        delay = backoff['resume_at'] - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        async with app['session'].post(app['telegram_url'], json=payload) as resp:
+            if resp.status == 200:
+                return resp.status, ''
+            try:
+                body = await resp.json(content_type=None)
+            except ValueError:
+                body = {}
+            if resp.status != 429:
+                description = body.get('description', '')
+                logger.error(f"Failed to send Telegram message: {resp.status} {description}")
+                return resp.status, description
+            retry_after = body.get('parameters', {}).get('retry_after', 1)
+
+        backoff['resume_at'] = max(backoff['resume_at'], loop.time() + retry_after)
+        if attempt < SEND_MAX_ATTEMPTS:
+            logger.warning(f"Telegram rate limit hit, retrying in {retry_after}s")
+    logger.error(f"Giving up sending Telegram message to chat {chat_id} after {SEND_MAX_ATTEMPTS} attempts")
+    return 429, ''
+
+
+def is_chat_error(description: str) -> bool:
+    """Tell whether a Bot API error concerns the chat itself rather than the message text"""
+    description = description.lower()
+    return any(marker in description for marker in _CHAT_ERROR_MARKERS)
+
+
+async def send_coalesced(app, chat_id: int, parts: List[str]):
+    """Send merged notifications, falling back to one call per part if Telegram rejects the text"""
+    status, description = await send_telegram_message(app, chat_id, SEND_SEPARATOR.join(parts))
+    # Only a 400 about the content (e.g. broken Markdown) can be blamed on a
+    # single part; errors about the chat would fail for every part as well
+    if status != 400 or len(parts) == 1 or is_chat_error(description):
+        return
+    # One bad part must not take the others down with it
+    logger.warning(f"Merged message to chat {chat_id} rejected, resending {len(parts)} parts separately")
+    for part in parts:
+        await send_telegram_message(app, chat_id, part)
+
+
+async def sender_worker(app, queue: asyncio.Queue):
+    """Take queued notifications in small batches and send them, one message per chat"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + SEND_BATCH_WINDOW
+        while len(batch) < SEND_BATCH_SIZE:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            for chat_id, parts in coalesce_messages(batch):
+                try:
+                    await send_coalesced(app, chat_id, parts)
+                except Exception as e:
+                    logger.error(f"Error sending notifications to chat {chat_id}: {e}")
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+async def create_webhook_app(bot_token: str, db: AsyncTopicDatabase):
     """Create the HTTP webhook application"""
-    app = web.Application()
+    app = web.Application(client_max_size=MAX_BODY_SIZE)
+    app['db'] = db
     app.router.add_post('/{topic_name}', webhook_handler)
+
+    # One keep-alive session to Telegram shared by all requests
+    app['telegram_url'] = TELEGRAM_SEND_MESSAGE_URL.format(token=bot_token)
+    app['session'] = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=75),
+        json_serialize=lambda obj: orjson.dumps(obj).decode()
+    )
+
+    # Outgoing notifications are queued and sent by a few background workers,
+    # each with its own bounded queue
+    app['send_queues'] = [asyncio.Queue(maxsize=SEND_QUEUE_SIZE) for _ in range(SEND_WORKERS)]
+    # Loop time before which no worker may call Telegram, set on rate limiting;
+    # kept in a mutable holder because the app's state is frozen once started
+    app['send_backoff'] = {'resume_at': 0.0}
+
+    async def start_senders(app):
+        app['senders'] = [asyncio.create_task(sender_worker(app, queue)) for queue in app['send_queues']]
+
+    async def stop_senders(app):
+        # Give pending notifications a chance to go out before stopping
+        queues = app['send_queues']
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in queues)), SEND_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {sum(queue.qsize() for queue in queues)} unsent notifications")
+        for task in app['senders']:
+            task.cancel()
+        await asyncio.gather(*app['senders'], return_exceptions=True)
+
+    # Dedicated threads for formatting large bodies, so other users of the
+    # default executor cannot starve them
+    app['body_executor'] = ThreadPoolExecutor(max_workers=2, thread_name_prefix='webhook-body')
+
+    async def close_session(app):
+        await app['session'].close()
+
+    async def stop_body_executor(app):
+        app['body_executor'].shutdown(wait=True)
+
+    app.on_startup.append(start_senders)
+    app.on_shutdown.append(stop_senders)
+    app.on_cleanup.append(close_session)
+    app.on_cleanup.append(stop_body_executor)
     
     # Health check endpoint
     async def health_check(request):
@@ -360,11 +649,15 @@ async def main():
 
     webhook_port = int(os.getenv('WEBHOOK_PORT', '8080'))
 
+    # Open the database before accepting any request
+    db = AsyncTopicDatabase()
+    await db.connect()
+
     # Initialize bot
-    notifier_bot = NotifierBot(bot_token, webhook_port)
+    notifier_bot = NotifierBot(bot_token, db, webhook_port)
     
     # Start webhook server
-    webhook_app = await create_webhook_app()
+    webhook_app = await create_webhook_app(bot_token, db)
     runner = web.AppRunner(webhook_app)
     await runner.setup()
     site = web.TCPSite(runner, '0.0.0.0', webhook_port)
@@ -379,18 +672,30 @@ async def main():
     logger.info("Starting Telegram bot...")
     await notifier_bot.app.updater.start_polling(drop_pending_updates=True)
     
+    # Sleep until SIGINT or SIGTERM asks us to stop
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows event loops lack add_signal_handler
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+
     try:
-        # Keep the program running
-        while True:
-            await asyncio.sleep(1)
-    except KeyboardInterrupt:
+        await stop.wait()
         logger.info("Shutting down...")
     finally:
         await notifier_bot.app.updater.stop()
         await notifier_bot.app.stop()
         await notifier_bot.app.shutdown()
         await runner.cleanup()
+        await db.close()
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    # Prefer the libuv-based loop where available (it is not on Windows)
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file